@@ -1,5 +1,7 @@
+import functools
 import os
 import sys
+from copy import deepcopy
 from pathlib import Path
 
 from uvicorn.config import LOGGING_CONFIG
@@ -19,7 +21,7 @@ ClusterFolderPath =
 # (Optional): Direct path to BanList.txt file
 BanListFile =
 
-# Process priority(Windows-only): LOW, BELOWNORMAL, NORMAL, ABOVENORMAL, HIGH
+# Process priority: LOW, BELOWNORMAL, NORMAL, ABOVENORMAL, HIGH (on Linux only LOW and BELOWNORMAL apply, as nice levels)
 Priority = LOW
 
 # Number of threads to use for processing (if the server's cpu has less cores than this setting, it will default to the server's cpu count)
@@ -42,21 +44,33 @@ if IS_EXE and IS_WINDOWS:
 else:
     ROOT_DIR = Path(os.path.dirname(os.path.abspath(__file__))).parent
 
+# Cores this process may actually run on, respects cgroup/cpuset limits on Linux
+if hasattr(os, "sched_getaffinity"):
+    AVAILABLE_CORES = len(os.sched_getaffinity(0)) or 1
+else:
+    AVAILABLE_CORES = os.cpu_count() or 1
+
 META_PATH = Path(os.path.abspath(os.path.dirname(__file__))).parent
 
 OUTPUT_DIR = ROOT_DIR / "output"
-OUTPUT_DIR.mkdir(exist_ok=True)
 FILE_NAME = "ASVExport.exe" if IS_WINDOWS else "ASVExport.dll"
 EXE_FILE = (
     Path(os.path.abspath(os.path.dirname(__file__))).parent / "exporter" / FILE_NAME
 )
 
 CONFIG = ROOT_DIR / "config.ini"
-if not CONFIG.exists():
-    CONFIG.write_text(DEFAULT_CONF.strip())
+# Seen tribelog hashes, kept across restarts so old logs aren't re-sent
+TRIBELOG_BUFFER_FILE = ROOT_DIR / "tribelogs.buffer"
+
+
+def ensure_layout() -> None:
+    """Create the output directory and a default config file if they are missing"""
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    if not CONFIG.exists():
+        CONFIG.write_text(DEFAULT_CONF.strip())
 
 
-BAR = [
+BAR = (
     "▱▱▱▱▱▱▱",
     "▰▱▱▱▱▱▱",
     "▰▰▱▱▱▱▱",
@@ -71,7 +85,7 @@ BAR = [
     "▱▱▱▱▰▰▰",
     "▱▱▱▱▱▰▰",
     "▱▱▱▱▱▱▰",
-]
+)
 
 LOGO = r"""
                 _  __      ___
@@ -83,33 +97,42 @@ LOGO = r"""
 """
 
 
-API_CONF = LOGGING_CONFIG.copy()
-log_fmt = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-date_fmt = "%Y-%m-%d %I:%M:%S %p"
-API_CONF["formatters"]["access"]["fmt"] = log_fmt
-API_CONF["formatters"]["default"]["fmt"] = log_fmt
-API_CONF["formatters"]["access"]["datefmt"] = date_fmt
-API_CONF["formatters"]["default"]["datefmt"] = date_fmt
-API_CONF["handlers"]["file"] = {
-    "formatter": "default",
-    "class": "logging.handlers.RotatingFileHandler",
-    "filename": str(ROOT_DIR / "uvicorn.log"),
-    "mode": "a",
-    "maxBytes": 1024 * 1024,
-    "backupCount": 1,
-}
-API_CONF["loggers"]["uvicorn"] = {
-    "handlers": ["default", "file"],
-    "level": "INFO",
-    "propagate": False,
-}
-API_CONF["loggers"]["uvicorn.access"] = {
-    "handlers": ["access", "file"],
-    "level": "INFO",
-    "propagate": False,
-}
-
-VALID_DATATYPES = [
+@functools.cache
+def get_api_conf() -> dict:
+    """Uvicorn logging config, built on first use"""
+    conf = deepcopy(LOGGING_CONFIG)
+    log_fmt = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+    date_fmt = "%Y-%m-%d %I:%M:%S %p"
+    conf["formatters"]["access"]["fmt"] = log_fmt
+    conf["formatters"]["default"]["fmt"] = log_fmt
+    conf["formatters"]["access"]["datefmt"] = date_fmt
+    conf["formatters"]["default"]["datefmt"] = date_fmt
+    conf["handlers"]["file"] = {
+        "formatter": "default",
+        "class": "logging.handlers.RotatingFileHandler",
+        "filename": str(ROOT_DIR / "uvicorn.log"),
+        "mode": "a",
+        "maxBytes": 1024 * 1024,
+        "backupCount": 1,
+    }
+    conf["loggers"]["uvicorn"] = {
+        "handlers": ["default", "file"],
+        "level": "INFO",
+        "propagate": False,
+    }
+    conf["loggers"]["uvicorn.access"] = {
+        "handlers": ["access", "file"],
+        "level": "INFO",
+        "propagate": False,
+    }
+    return conf
+
+
+VALID_PRIORITIES = frozenset(
+    sys.intern(p) for p in ("LOW", "BELOWNORMAL", "NORMAL", "ABOVENORMAL", "HIGH")
+)
+
+DATATYPES = (
     "mapstructures",
     "players",
     "structures",
@@ -117,5 +140,8 @@ VALID_DATATYPES = [
     "tribelogs",
     "tribes",
     "wild",
-    "all",
-]
+)
+# Requests every cached datatype at once, not an export of its own
+ALL_SENTINEL = "all"
+VALID_DATATYPES: frozenset[str] = frozenset(DATATYPES)
+VALID_DATATYPES_TEXT = ", ".join((*DATATYPES, ALL_SENTINEL))
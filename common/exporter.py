@@ -1,23 +1,63 @@
 import asyncio
 import logging
+import mmap
 import os
+import re
+import shlex
 import subprocess
-from hashlib import md5
+from array import array
 from pathlib import Path
 
+import ijson
 import orjson
+import psutil
+import xxhash
+from ijson.common import ObjectBuilder
 
-from common.constants import IS_WINDOWS
-from common.models import cache  # noqa
-from common.utils import get_affinity_mask, wait_for_process
+from common.constants import AVAILABLE_CORES, IS_WINDOWS, TRIBELOG_BUFFER_FILE
+from common.models import cache
+from common.utils import get_affinity_cores
+from common.watcher import watch_file
 
 log = logging.getLogger("arkview.exporter")
 
+# ASV_Players.json -> Players
+EXPORT_KEY_RE = re.compile(r"^(?:ASV_)?(.+)\.json$")
+# Seconds between forced export checks while watching the map file. SMB/NFS shares,
+# Docker bind mounts and WSL /mnt/c never deliver change events, and a check is just
+# one stat of the map, so keep this short
+WATCH_FALLBACK_INTERVAL = 30
+# Pulsed each time the exporter process finishes
+_exporter_exited = asyncio.Event()
+
+if IS_WINDOWS:
+    PRIORITY_CLASSES = {
+        "LOW": subprocess.IDLE_PRIORITY_CLASS,
+        "BELOWNORMAL": subprocess.BELOW_NORMAL_PRIORITY_CLASS,
+        "NORMAL": subprocess.NORMAL_PRIORITY_CLASS,
+        "ABOVENORMAL": subprocess.ABOVE_NORMAL_PRIORITY_CLASS,
+        "HIGH": subprocess.HIGH_PRIORITY_CLASS,
+    }
+else:
+    # Raising priority above normal needs root, so those stay at the default niceness
+    NICE_LEVELS = {
+        "LOW": 19,
+        "BELOWNORMAL": 10,
+        "NORMAL": 0,
+        "ABOVENORMAL": 0,
+        "HIGH": 0,
+    }
+
 
 async def export_loop():
-    global cache
     if isinstance(cache.map_file, str):
         cache.map_file = Path(cache.map_file)
+    try:
+        await _export()
+        async for _ in watch_file(cache.map_file, WATCH_FALLBACK_INTERVAL):
+            await _export()
+    except Exception as e:
+        log.error("Map file watcher failed, falling back to polling", exc_info=e)
     while True:
         try:
             await process_export()
@@ -27,205 +67,381 @@ async def export_loop():
             await asyncio.sleep(15)
 
 
+async def _export():
+    try:
+        await process_export()
+    except Exception as e:
+        log.error("Export failed", exc_info=e)
+
+
 async def process_export():
-    global cache
-    if cache.syncing:
+    if cache.syncing.is_set():
         return
     try:
-        cache.syncing = True
+        cache.syncing.set()
         await _process_export()
     finally:
-        cache.syncing = False
+        cache.syncing.clear()
 
 
 async def wipe_output():
-    global cache
-    to_delete = list(cache.output_dir.glob("*.json"))
+    try:
+        with os.scandir(cache.output_dir) as entries:
+            to_delete = [e for e in entries if e.name.endswith(".json")]
+    except FileNotFoundError:
+        to_delete = []
     if to_delete:
         log.info(f"Wiping {len(to_delete)} files from output directory")
     for file in to_delete:
         try:
-            file.unlink(missing_ok=True)
+            os.unlink(file.path)
+        except FileNotFoundError:
+            pass
         except Exception as e:
             log.error(f"Failed to delete {file.name}", exc_info=e)
+    cache.export_fingerprints.clear()
     if cache.exports:
-        cache.exports.clear()
+        cache.exports = {}
+        cache.tames_index = None
+        cache.state_version += 1
         log.info("Cleared exports")
 
 
 async def _process_export():
-    global cache
-    if not cache.map_file.exists():
+    # Stat the map first so an unchanged map only costs a single syscall
+    try:
+        map_file_modified = int(os.stat(cache.map_file).st_mtime)
+    except FileNotFoundError:
         log.warning("No map file found")
         await wipe_output()
         return
-    if not cache.exe_file.exists():
+
+    if cache.map_last_modified:
+        if cache.map_last_modified == map_file_modified:
+            # Map file hasnt updated yet
+            return
+
+    try:
+        os.stat(cache.exe_file)
+    except FileNotFoundError:
         log.warning("No export executable found")
         return
-    if cache.cluster_dir and not cache.cluster_dir.exists():
-        log.warning("Cluster is set but the path specified ")
+    if cache.cluster_dir:
+        try:
+            os.stat(cache.cluster_dir)
+        except FileNotFoundError:
+            log.warning("Cluster is set but the path specified does not exist")
     cache.output_dir.mkdir(exist_ok=True)
 
-    map_file_modified = cache.map_file.stat().st_mtime
-
     if cache.map_last_modified:
-        if int(cache.map_last_modified) == int(map_file_modified):
-            # Map file hasnt updated yet
-            return
         log.info("Map file has been updated, re-exporting")
 
     cache.map_last_modified = map_file_modified
 
     # Threads should be equal to half of the total CPU threads
-    available_cores = os.cpu_count() or 1
-    threads = min(available_cores, cache.threads)
+    # Threads = 0 or less would leave an empty affinity set and fail every spawn
+    threads = max(1, min(AVAILABLE_CORES, cache.threads))
     priority = cache.priority  # LOW, BELOWNORMAL, NORMAL, ABOVENORMAL, HIGH
 
     # ASVExport.exe all "path/to/map/file" "path/to/cluster" "path/to/output/folder"
     # ASVExport.exe all "C:\Users\Vert\Documents\Projects-Local\arkviewer\testdata\map_ase\Ragnarok.ark" "C:\Users\Vert\Documents\Projects-Local\arkviewer\testdata\solecluster_ase\" "C:\Users\Vert\Desktop\output\"
     # ASVExport.exe all "C:\Users\Vert\Documents\Projects-Local\arkviewer\testdata\map_asa\TheIsland_WP.ark" "C:\Users\Vert\Documents\Projects-Local\arkviewer\testdata\solecluster_asa\" "C:\Users\Vert\Desktop\output\"
     if IS_WINDOWS:
-        mask = get_affinity_mask(threads)
-        command = [
-            "start",
-            f"/{priority}",
-            "/MIN",
-            "/AFFINITY",
-            mask,
-            str(cache.exe_file),
-            "all",
-            f'"{cache.map_file}"',
-        ]
+        command = [str(cache.exe_file), "all", str(cache.map_file)]
         if cdir := cache.cluster_dir:
-            command.append(f'"{cdir}\\"')
-        command.append(f'"{cache.output_dir}\\"')
+            command.append(str(cdir) + os.sep)
+        command.append(str(cache.output_dir) + os.sep)
     else:
-        cpu_range = f"0-{threads - 1}" if threads > 1 else "0"
-        command = [
-            "taskset",
-            "-c",
-            cpu_range,
-            "dotnet",
-            str(cache.exe_file),
-            "all",
-            str(cache.map_file),
-        ]
+        command = ["dotnet", str(cache.exe_file), "all", str(cache.map_file)]
         if cdir := cache.cluster_dir:
-            command.append(str(cdir) + "/")
-        command.append(str(cache.output_dir) + "/")
+            command.append(str(cdir) + os.sep)
+        command.append(str(cache.output_dir) + os.sep)
+
+    # Log the exact command line the argv list turns into, so it can be pasted into a shell
+    join = subprocess.list2cmdline if IS_WINDOWS else shlex.join
+    log.log(
+        logging.INFO if cache.debug else logging.DEBUG, "Running: %s", join(command)
+    )
 
-    if cache.debug:
-        log.info(f"Running: {command}")
+    kwargs = {}
+    if IS_WINDOWS:
+        kwargs["creationflags"] = (
+            PRIORITY_CLASSES[priority] | subprocess.CREATE_NO_WINDOW
+        )
     else:
-        log.debug(f"Running: {command}")
+        # Pin and renice the child itself before exec instead of wrapping it in taskset
+        cores = set(sorted(os.sched_getaffinity(0))[:threads])
+        niceness = NICE_LEVELS[priority]
+
+        def _preexec():
+            os.sched_setaffinity(0, cores)
+            if niceness:
+                os.nice(niceness)
+
+        kwargs["preexec_fn"] = _preexec
 
     try:
+        if not IS_WINDOWS:
+            ensure_permissions()
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stderr=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            cwd=str(cache.root_dir),
+            **kwargs,
+        )
         if IS_WINDOWS:
-            os.system(" ".join(command))
-        else:
-            # Ensure all the paths have r/w and execute permissions
-            cache.exe_file.chmod(0o777)
-            cache.map_file.chmod(0o777)
-            cache.output_dir.chmod(0o777)
-            result = subprocess.run(
-                command,
-                stderr=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                cwd=str(cache.root_dir),
-            )
-            if stdout := result.stdout.decode("utf-8", errors="ignore"):
-                log.info(stdout)
-            if stderr := result.stderr.decode("utf-8", errors="ignore"):
-                log.info(stderr)
-        await asyncio.sleep(5)
-        await wait_for_process(
-            "ASVExport"
-        )  # Waits for the process with that name to close
-        await asyncio.sleep(5)
-    except subprocess.CalledProcessError as e:
-        log.error("Export failed", exc_info=e)
-        log.error(f"Standard Output: {e.stdout}")
-        log.error(f"Standard Error: {e.stderr}")
+            try:
+                psutil.Process(proc.pid).cpu_affinity(get_affinity_cores(threads))
+            except psutil.Error as e:
+                log.warning("Failed to set exporter affinity", exc_info=e)
+        stdout, stderr = await proc.communicate()
+        if stdout := stdout.decode("utf-8", errors="ignore"):
+            log.info(stdout)
+        if stderr := stderr.decode("utf-8", errors="ignore"):
+            log.info(stderr)
     except Exception as e:
         log.error("Export failed", exc_info=e)
 
+    # Wake anything waiting on half-written output files, set() releases current waiters
+    # even though we clear straight away for the next export
+    _exporter_exited.set()
+    _exporter_exited.clear()
+
     try:
         await load_outputs()
     except Exception as e:
         log.error("Failed to load outputs", exc_info=e)
 
 
-async def load_outputs(target: str = ""):
-    global cache
+def ensure_permissions():
+    # Ensure all the paths have r/w and execute permissions. Checked before every export
+    # since a server update or map save can replace these files without the bits
+    for path in (cache.exe_file, cache.map_file, cache.output_dir):
+        if os.stat(path).st_mode & 0o777 != 0o777:
+            os.chmod(path, 0o777)
 
-    asv_players = cache.output_dir / "ASV_Players.json"
-    if asv_players.exists():
-        cache.last_export = asv_players.stat().st_mtime
 
-    files = list(cache.output_dir.glob("*.json"))
-    for export_file in files:
-        key = export_file.stem.replace("ASV_", "").lower().strip()
-        if target and target.lower() != key:
-            continue
+def read_json(path: str | os.PathLike):
+    # Map the file instead of reading it so orjson parses straight from the page cache.
+    # A raw fd skips building a buffered file object we'd never read through
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        # Length 0 maps whatever the file holds now, not a possibly stale earlier stat
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    with mm:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        with memoryview(mm) as view:
+            return orjson.loads(view)
 
-        # Before reading the file, make sure it is not being accessed by another process
-        waiting = 0
-        while export_file.stat().st_size == 0:
-            await asyncio.sleep(6)
-            waiting += 1
-            if waiting > 10:
-                break
 
-        if waiting > 10:
-            log.error(
-                f"Failed to load {export_file.name}, waited too long for it to be written"
-            )
-            continue
+def _tribe_seed(tribe_id) -> int:
+    # Hash entries with the tribe as the seed instead of prepending it to every entry
+    try:
+        return int(tribe_id) & 0xFFFFFFFFFFFFFFFF
+    except (TypeError, ValueError):
+        return xxhash.xxh3_64_intdigest(str(tribe_id).encode())
 
-        raw_file = export_file.read_bytes()
 
-        log.debug(f"Loading {export_file.name}")
-        try:
-            dump = orjson.loads(raw_file)
-        except Exception as e:
-            log.error(f"Failed to load {export_file.name}", exc_info=e)
-            continue
+def load_tribelog_buffer():
+    """Restore the tribelog hashes saved by the last shutdown"""
+    if not TRIBELOG_BUFFER_FILE.exists():
+        return
+    hashes = array("Q")
+    try:
+        hashes.frombytes(TRIBELOG_BUFFER_FILE.read_bytes())
+    except ValueError as e:
+        log.error("Tribelog buffer file is corrupt, ignoring it", exc_info=e)
+        return
+    cache.tribelog_buffer = set(hashes)
+    log.info(f"Loaded {len(cache.tribelog_buffer)} cached tribe logs")
+
+
+def save_tribelog_buffer():
+    """Persist the tribelog hashes so a restart doesn't need a fresh first run"""
+    if not cache.tribelog_buffer:
+        return
+    TRIBELOG_BUFFER_FILE.write_bytes(array("Q", cache.tribelog_buffer).tobytes())
+    log.info(f"Saved {len(cache.tribelog_buffer)} cached tribe logs")
+
+
+def _dedupe_tribe(
+    tribe: dict, seen: set[int], current: set[int], first_run: bool
+) -> dict | None:
+    """Record a tribe's logs in `current`, returning the tribe with only unseen logs"""
+    if "logs" not in tribe:
+        return None
+    tribe_id = tribe.get("tribeid")
+    if not tribe_id:
+        return None
+    seed = _tribe_seed(tribe_id)
+    hasher = xxhash.xxh3_64_intdigest
+    # Keyed by hash so repeated entries within the same tribe collapse into one
+    entries = {hasher(str(entry).encode(), seed): entry for entry in tribe["logs"]}
+    current.update(entries)
+    unseen = [entry for key, entry in entries.items() if key not in seen]
+    if not unseen or first_run:
+        return None
+    tribe["logs"] = unseen
+    return tribe
+
 
-        if not dump:
-            log.error(f"No data found in {export_file.name}")
+def _read_tribelog_top_level(f, full: bool) -> dict:
+    """Top level values other than "data", stopping at "data" unless `full` is set"""
+    top = {}
+    builder: ObjectBuilder | None = None
+    building = ""
+    in_data = False
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if in_data:
+            # The tribes are built separately by ijson.items, only watch for the end
+            if prefix == "data" and event == "end_array":
+                in_data = False
             continue
+        if builder is None:
+            if prefix == "data" and event == "start_array":
+                if not full:
+                    break
+                in_data = True
+                continue
+            if not prefix or event == "map_key":
+                continue
+            if event not in ("start_map", "start_array"):
+                top[prefix] = value
+                continue
+            builder, building = ObjectBuilder(), prefix
+        builder.event(event, value)
+        if prefix == building and event in ("end_map", "end_array"):
+            top[building] = builder.value
+            builder = None
+    return top
 
-        def _precache(data: dict):
-            first_run = not cache.tribelog_buffer
-            new_tribelog_payload = []
-            for i in data["data"]:
-                if "logs" not in i:
-                    continue
-                tribe_id = i.get("tribeid")
-                if not tribe_id:
-                    continue
-                new_logs = []
-                for entry in i["logs"]:
-                    key = md5(f"{tribe_id}{entry}".encode()).hexdigest()
-                    if key in cache.tribelog_buffer:
-                        continue
-                    cache.tribelog_buffer.add(key)
-                    if not first_run:
-                        new_logs.append(entry)
-                if new_logs:
-                    i["logs"] = new_logs
-                    new_tribelog_payload.append(i)
-            if first_run:
-                log.info(
-                    f"First run, pre-cached {len(cache.tribelog_buffer)} tribe logs"
-                )
-            data["data"] = new_tribelog_payload
-            return data
-
-        if key == "tribelogs":
-            dump = await asyncio.to_thread(_precache, dump)
 
+def _stream_tribelogs(path: str | os.PathLike) -> dict:
+    """Dedupe tribelogs as the parser yields them so the whole export never sits in memory.
+
+    The top level values (map/day/time) are read event by event, then the tribes under
+    "data" are built by ijson's C backend one at a time and filtered against the
+    tribelog buffer.
+    """
+    seen = cache.tribelog_buffer
+    first_run = not seen
+    current: set[int] = set()
+    with open(path, "rb") as f:
+        # ASVExport writes map/day/time ahead of the tribes, so normally the header is
+        # enough. Otherwise walk the whole file so trailing values aren't lost
+        dump = _read_tribelog_top_level(f, full=False)
+        if "day" not in dump or "time" not in dump:
+            log.debug("Tribelogs day/time not ahead of data, scanning the whole file")
+            f.seek(0)
+            dump = _read_tribelog_top_level(f, full=True)
+        f.seek(0)
+        dump["data"] = [
+            tribe
+            for item in ijson.items(f, "data.item", use_float=True)
+            if (tribe := _dedupe_tribe(item, seen, current, first_run))
+        ]
+    # Only lines still in the export are remembered, so nothing live is ever evicted
+    cache.tribelog_buffer = current
+    if first_run:
+        log.info(f"First run, pre-cached {len(current)} tribe logs")
+    return dump
+
+
+async def _load_export(key: str, name: str, path: str) -> dict | None:
+    # Before reading the file, make sure it is not being accessed by another process
+    waiting = 0
+    while not (size := (st := os.stat(path)).st_size):
+        waiting += 1
+        if waiting > 10:
+            log.error(f"Failed to load {name}, waited too long for it to be written")
+            return
+        # An empty file is still being written, re-check as soon as the exporter exits
         try:
-            cache.exports[key] = dump
-        except Exception as e:
-            log.error(f"Failed to cache export: {type(dump)}", exc_info=e)
+            await asyncio.wait_for(_exporter_exited.wait(), timeout=6)
+        except asyncio.TimeoutError:
+            pass
+
+    # Unchanged files keep their cached parse. Tribelogs always reload since their
+    # payload is the delta since the last load, not the file contents
+    fingerprint = (st.st_mtime_ns, size)
+    if (
+        key != "tribelogs"
+        and key in cache.exports
+        and cache.export_fingerprints.get(key) == fingerprint
+    ):
+        log.debug("%s is unchanged, skipping", name)
+        return
+
+    log.debug("Loading %s", name)
+    try:
+        dump = await asyncio.to_thread(_parse_export, key, path)
+    except Exception as e:
+        log.error(f"Failed to load {name}", exc_info=e)
+        return
+
+    if not dump:
+        log.error(f"No data found in {name}")
+        return
+    cache.export_fingerprints[key] = fingerprint
+    return dump
+
+
+def _parse_export(key: str, path: str):
+    # Runs in a worker thread, tribelogs are deduped in the same hop as the parse
+    if key == "tribelogs":
+        return _stream_tribelogs(path)
+    return read_json(path)
+
+
+def _publish_exports(loaded: dict[str, dict]):
+    # Swap in a fresh dict so API handlers iterating the old one never see it change
+    if loaded:
+        cache.exports = {**cache.exports, **loaded}
+        cache.state_version += 1
+        if "tamed" in loaded:
+            cache.tames_index = None
+
+
+async def load_outputs(target: str = ""):
+    try:
+        last_export = int(os.stat(cache.output_dir / "ASV_Players.json").st_mtime)
+    except FileNotFoundError:
+        pass
+    else:
+        if last_export != cache.last_export:
+            cache.last_export = last_export
+            cache.state_version += 1
+
+    target = target.lower()
+    files: list[tuple[str, str, str]] = []
+    with os.scandir(cache.output_dir) as entries:
+        for export_file in entries:
+            if not (match := EXPORT_KEY_RE.match(export_file.name)):
+                continue
+            key = match.group(1).lower()
+            if target and target != key:
+                continue
+            files.append((key, export_file.name, export_file.path))
+
+    # Parsing happens in worker threads, so let a few files load at once
+    semaphore = asyncio.Semaphore(max(1, min(len(files), AVAILABLE_CORES)))
+
+    async def _load_one(key: str, name: str, path: str):
+        async with semaphore:
+            return await _load_export(key, name, path)
+
+    # One file vanishing or failing mid-load shouldn't throw away the others
+    results = await asyncio.gather(
+        *(_load_one(*file) for file in files), return_exceptions=True
+    )
+    loaded = {}
+    for (key, name, _), result in zip(files, results):
+        if isinstance(result, Exception):
+            log.error(f"Failed to load {name}", exc_info=result)
+        elif result is not None:
+            loaded[key] = result
+    _publish_exports(loaded)
@@ -1,6 +1,8 @@
+import atexit
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 import colorama
 import sentry_sdk
@@ -29,9 +31,15 @@ colorama.init(autoreset=True)
 
 
 class PrettyFormatter(logging.Formatter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.formatters = {
+            level: logging.Formatter(fmt=log_fmt, datefmt="%I:%M:%S %p")
+            for level, log_fmt in formats.items()
+        }
+
     def format(self, record):
-        log_fmt = formats[record.levelno]
-        formatter = logging.Formatter(fmt=log_fmt, datefmt="%I:%M:%S %p")
+        formatter = self.formatters.get(record.levelno, self.formatters[logging.INFO])
         return formatter.format(record)
 
 
@@ -58,10 +66,21 @@ def init_logging():
     )
     file_handler.setFormatter(file_formatter)
 
+    # Handlers run on the listener's thread so log writes/rotation never block the event loop
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(
+        log_queue, stdout_handler, file_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    queue_handler = QueueHandler(log_queue)
+    # Only merge args/tracebacks into the message here, the real handlers do the formatting
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
     logging.basicConfig(
         level=logging.DEBUG,
         datefmt=dt_fmt,
-        handlers=[stdout_handler, file_handler],
+        handlers=[queue_handler],
     )
 
 
@@ -1,3 +1,5 @@
+import asyncio
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from pydantic import BaseModel
@@ -13,7 +15,10 @@ class Dtypes(BaseModel):
     dtypes: list[str]
 
 
-class Cache(BaseModel):
+@dataclass(slots=True)
+class Cache:
+    """Process-wide mutable state, not an API boundary so it skips pydantic validation"""
+
     config: Path
     root_dir: Path
     output_dir: Path
@@ -31,10 +36,20 @@ class Cache(BaseModel):
     asatest: bool = True
 
     # States/Cache
-    exports: dict[str, list[dict]] = {}
-    syncing: bool = False
-    tribelog_buffer: set[str] = set()
+    exports: dict[str, dict] = field(default_factory=dict)
+    # Export key -> (mtime_ns, size) of the file its cached data was parsed from
+    export_fingerprints: dict[str, tuple[int, int]] = field(default_factory=dict)
+    # Set while an export is running so the status bar can wait on it instead of polling
+    syncing: asyncio.Event = field(default_factory=asyncio.Event)
+    # Hashes of the log lines in the last tribelogs export, replaced on every load so
+    # it stays as big as the export itself
+    tribelog_buffer: set[int] = field(default_factory=set)
     last_export: int = 0
+    # (state_version, tribeid -> uncryod tames) for /overlimit, dropped when a new tamed
+    # export is published so the old export's tames can be freed
+    tames_index: tuple[int, dict[int, list[dict]]] | None = None
+    # Bumped whenever exports/last_export/settings change so derived views can be reused
+    state_version: int = 0
     map_last_modified: int = 0
 
 
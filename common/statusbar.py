@@ -1,21 +1,38 @@
 import asyncio
-import os
-from itertools import cycle
+import ctypes
 from pathlib import Path
 
-from .constants import BAR
-from .models import cache  # noqa
+from .constants import BAR, IS_WINDOWS
+from .models import cache
 from .version import VERSION
 
+if IS_WINDOWS:
+    _set_title = ctypes.windll.kernel32.SetConsoleTitleW
+    _set_title.argtypes = [ctypes.c_wchar_p]
+    _set_title.restype = ctypes.c_bool
+else:
+
+    def _set_title(title: str) -> bool:
+        return False
+
 
 async def status_bar():
     await asyncio.sleep(5)
-    global cache
-    bar_cycle = cycle(BAR)
     path = Path(str(cache.map_file))
+    # Render every frame up front so each tick is just a lookup
+    prefix = f"ArkViewer {VERSION} - {path.stem} "
+    frames = tuple((prefix + frame, prefix + frame + " [Syncing...]") for frame in BAR)
+    count = len(frames)
+    index = 0
     while True:
-        cmd = f"title ArkViewer {VERSION} - {path.stem} {next(bar_cycle)}"
-        if cache.syncing:
-            cmd += " [Syncing...]"
-        os.system(cmd)
-        await asyncio.sleep(0.15)
+        idle, syncing = frames[index]
+        index = (index + 1) % count
+        _set_title(syncing if cache.syncing.is_set() else idle)
+        if cache.syncing.is_set():
+            await asyncio.sleep(0.5)
+            continue
+        # Idle: only wake for the next spinner frame or as soon as a sync starts
+        try:
+            await asyncio.wait_for(cache.syncing.wait(), timeout=1.0)
+        except asyncio.TimeoutError:
+            pass
@@ -1,36 +1,153 @@
 import asyncio
-import json
+import hmac
 import logging
-import multiprocessing
 import os
+import re
+import stat
 import sys
+import time
 from collections import defaultdict
-from configparser import ConfigParser
-from datetime import datetime, timedelta
 from pathlib import Path
 
-import psutil
+import orjson
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from fastapi_utils.cbv import cbv
 from fastapi_utils.inferring_router import InferringRouter
 from uvicorn import Config, Server
 
-from common.constants import DEFAULT_CONF, IS_EXE, IS_WINDOWS, VALID_DATATYPES
-from common.exporter import export_loop, load_outputs, process_export
+from common.constants import (
+    ALL_SENTINEL,
+    AVAILABLE_CORES,
+    DEFAULT_CONF,
+    IS_EXE,
+    IS_WINDOWS,
+    VALID_DATATYPES,
+    VALID_DATATYPES_TEXT,
+    VALID_PRIORITIES,
+)
+from common.exporter import export_loop, load_outputs
 from common.logger import init_sentry
-from common.models import Banlist, Dtypes, cache  # noqa
-from common.scheduler import scheduler
+from common.models import Banlist, Dtypes, cache
 from common.statusbar import status_bar
-from common.utils import dotnet_installed, format_sys_info
+from common.utils import BOOT_TIME, dotnet_installed, format_sys_info
 from common.version import VERSION
 
-api = FastAPI()
+api = FastAPI(default_response_class=ORJSONResponse)
 router = InferringRouter()
-parser = ConfigParser()
 
 log = logging.getLogger("arkview")
 
+OS_NAME = "Windows" if IS_WINDOWS else "Linux"
+
+# Only flat key = value pairs are used, so a regex pass over the file replaces ConfigParser
+SECTION_RE = re.compile(r"^[ \t]*\[([^\]\n]+)\][ \t]*$", re.M)
+# ConfigParser accepted both "=" and ":" as the separator, so we do too
+OPTION_RE = re.compile(r"^[ \t]*([^#;=:\s][^=:\n]*?)[ \t]*[=:][ \t]*(.*?)[ \t]*$", re.M)
+TRUTHY = frozenset(("1", "yes", "true", "on"))
+
+# stringify -> info() payload minus uptime, valid while _info_version matches cache.state_version
+_info_cache: dict[bool, dict] = {}
+_info_version = -1
+
+# (mtime_ns, settings) of the last config read
+_settings_cache: tuple[int, dict[str, str]] | None = None
+# (monotonic time, stats) of the last /stats sample
+STATS_TTL = 1.0
+_stats_cache: tuple[float, dict] | None = None
+_stats_lock = asyncio.Lock()
+# ((mtime_ns, size), bans) of the last banlist read
+_banlist_cache: tuple[tuple[int, int], list[str]] | None = None
+
+
+def _load_settings(path: Path) -> dict[str, str]:
+    """Parse the [Settings] section, reusing the last result until the file changes"""
+    global _settings_cache
+    mtime = os.stat(path).st_mtime_ns
+    if _settings_cache and _settings_cache[0] == mtime:
+        return _settings_cache[1]
+    # [preamble, name, body, name, body, ...]
+    parts = SECTION_RE.split(path.read_text())
+    sections = dict(zip(parts[1::2], parts[2::2]))
+    # Keys are lowercased like ConfigParser did, values have their quotes stripped once here
+    settings = {
+        k.lower(): v.replace('"', "")
+        for k, v in OPTION_RE.findall(sections["Settings"])
+    }
+    _settings_cache = (mtime, settings)
+    return settings
+
+
+def _read_banlist(path: Path) -> list[str]:
+    """Parse the banlist file, reusing the last result until the file changes"""
+    global _banlist_cache
+    st = os.stat(path)
+    fingerprint = (st.st_mtime_ns, st.st_size)
+    if _banlist_cache and _banlist_cache[0] == fingerprint:
+        return _banlist_cache[1]
+    bans = [ban for line in path.read_text().splitlines() if (ban := line.strip())]
+    _banlist_cache = (fingerprint, bans)
+    return bans
+
+
+def _uncryod_tames_by_tribe(tamed: dict, version: int) -> dict[int, list[dict]]:
+    """Group uncryod tames by tribe, rebuilt only when cache.state_version moves"""
+    if (index := cache.tames_index) and index[0] == version:
+        return index[1]
+    found: set[tuple] = set()
+    tribe_tames: dict[int, list[dict]] = defaultdict(list)
+    for tame in tamed["data"]:
+        if tame.get("uploadedTime") or tame["cryo"]:
+            continue
+        key = (tame["id"], tame["dinoid"])
+        if key in found:
+            continue
+        found.add(key)
+        tribe_tames[int(tame["tribeid"])].append(tame)
+    # A newer export may have landed while this ran in its thread, don't pin the old one
+    if version == cache.state_version:
+        cache.tames_index = (version, tribe_tames)
+    return tribe_tames
+
+
+async def _get_sys_info() -> dict:
+    """format_sys_info() blocks on a 0.1s CPU sample, so reuse it for a burst of polls"""
+    global _stats_cache
+    if _stats_cache and time.monotonic() - _stats_cache[0] < STATS_TTL:
+        return _stats_cache[1]
+    async with _stats_lock:
+        # Whoever held the lock may have just refreshed it
+        if _stats_cache and time.monotonic() - _stats_cache[0] < STATS_TTL:
+            return _stats_cache[1]
+        stats = await asyncio.to_thread(format_sys_info)
+        _stats_cache = (time.monotonic(), stats)
+        return stats
+
+
+def _stringify(info: dict) -> dict[str, str]:
+    """Header-safe copy of an info() payload"""
+    return {k: ", ".join(v) if isinstance(v, list) else str(v) for k, v in info.items()}
+
+
+def _merged_json(data: dict, info: dict) -> bytes:
+    """Encode {**data, **info} by splicing the two encoded objects instead of copying data"""
+    body = orjson.dumps(info, option=orjson.OPT_NON_STR_KEYS)
+    if not data:
+        return body
+    encoded = memoryview(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS))
+    return b"".join((encoded[:-1], b",", memoryview(body)[1:]))
+
+
+def _stat(path: str) -> os.stat_result | None:
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def _as_bool(value: str) -> bool:
+    return value.lower() in TRUTHY
+
 
 @cbv(router)
 class ArkViewer:
@@ -42,15 +159,13 @@ class ArkViewer:
     """
 
     async def initialize(self) -> bool:
-        global cache
         if not cache.config.exists():
             log.warning("No config file exists! Creating one...")
             cache.config.write_text(DEFAULT_CONF)
             return False
 
         log.info(f"Reading from {cache.config}")
-        parser.read(str(cache.config))
-        settings = parser["Settings"]
+        settings = _load_settings(cache.config)
 
         # Make sure all settings are present
         required = [
@@ -66,7 +181,7 @@ class ArkViewer:
         ]
         # We want to update the config file with the default values if they're missing
         for key in required:
-            if key in settings:
+            if key.lower() in settings:
                 continue
             # Rename the current config file to `config.ini.old`
             cache.config.rename(cache.config.with_suffix(".old"))
@@ -84,29 +199,28 @@ class ArkViewer:
         parsed = [f"{k}: {v}\n" for k, v in settings.items()]
         log.info(f"Parsed settings\n{''.join(parsed)}")
 
-        cache.debug = settings.getboolean("Debug", fallback=False)
+        cache.debug = _as_bool(settings.get("debug", ""))
         if cache.debug:
             log.setLevel(logging.DEBUG)
         else:
             log.setLevel(logging.INFO)
-        cache.asatest = settings.getboolean("ASATest", fallback=False)
-        cache.port = settings.getint("Port", fallback=8000)
+        cache.asatest = _as_bool(settings.get("asatest", ""))
+        cache.port = int(settings.get("port", 8000))
 
-        priority = settings.get("Priority", fallback="NORMAL").upper()
-        if priority not in ["LOW", "BELOWNORMAL", "NORMAL", "ABOVENORMAL", "HIGH"]:
+        priority = settings.get("priority", "NORMAL").upper()
+        if priority not in VALID_PRIORITIES:
             log.error("Invalid priority setting! Using LOW")
             priority = "LOW"
         cache.priority = priority
 
-        cpus = os.cpu_count() or 1
-        cache.threads = settings.getint("Threads", fallback=2)
-        if cache.threads > cpus:
+        cache.threads = int(settings.get("threads", 2))
+        if cache.threads > AVAILABLE_CORES:
             log.warning(
-                f"Threads set to {cache.threads} but only {cpus} available, defaulting to {cpus}"
+                f"Threads set to {cache.threads} but only {AVAILABLE_CORES} available, defaulting to {AVAILABLE_CORES}"
             )
-            cache.threads = cpus
+            cache.threads = AVAILABLE_CORES
 
-        cache.api_key = settings.get("APIKey", fallback="").replace('"', "")
+        cache.api_key = settings.get("apikey", "")
         if not cache.api_key:
             log.warning("API key is not set! Running with reduced security!")
 
@@ -120,60 +234,65 @@ class ArkViewer:
                 log.info("Using test files (ASE)")
                 cache.map_file = testdata / "map_ase" / "LostIsland.ark"
                 cache.cluster_dir = testdata / "solecluster_ase"
+            # Configured paths are validated below, the test ones are only checked here
+            if not cache.map_file.exists():
+                log.error("Map file does not exist!")
+                return False
+            if not cache.cluster_dir.exists():
+                log.error("Cluster dir does not exist!")
+                return False
         else:
             if dsn := settings.get(
-                "DSN",
-                fallback="https://ab80bb7b88b00008400a4c63dbf85dac@sentry.vertyco.net/4",
-            ).replace('"', ""):
+                "dsn",
+                "https://ab80bb7b88b00008400a4c63dbf85dac@sentry.vertyco.net/4",
+            ):
                 log.info("Initializing Sentry")
                 if dsn.strip():
                     init_sentry(dsn=dsn.strip(), version=VERSION)
 
-            cache.map_file = settings.get("MapFilePath", fallback="").replace('"', "")
-            if not cache.map_file:
+            map_file = settings.get("mapfilepath", "")
+            if not map_file:
                 log.error("Map file path cannot be empty!")
                 return False
+            map_path = Path(map_file)
             # Make sure cache.config and cache.map_file are on the same physical drive
-            if cache.config.resolve().drive != Path(cache.map_file).resolve().drive:
+            if cache.config.resolve().drive != map_path.resolve().drive:
                 log.warning(
                     "Config file and map file should be on the same drive! %s %s",
                     cache.config,
-                    cache.map_file,
+                    map_file,
                 )
-            if not Path(cache.map_file).exists():
-                log.error("Map file does not exist! %s", cache.map_file)
+            st = _stat(map_file)
+            if st is None:
+                log.error("Map file does not exist! %s", map_file)
                 return False
-            if not Path(cache.map_file).is_file():
-                log.error(
-                    "Map path must be a file, not a directory! %s", cache.map_file
-                )
+            if not stat.S_ISREG(st.st_mode):
+                log.error("Map path must be a file, not a directory! %s", map_file)
                 return False
-            else:
-                cache.map_file = Path(cache.map_file)
+            cache.map_file = map_path
 
-            cache.cluster_dir = settings.get("ClusterFolderPath", fallback="").replace(
-                '"', ""
-            )
-            if not cache.cluster_dir:
+            cluster_dir = settings.get("clusterfolderpath", "")
+            if not cluster_dir:
+                cache.cluster_dir = cluster_dir
                 log.warning(
                     "Cluster dir has not been set, some features will be unavailable!"
                 )
-            elif not Path(cache.cluster_dir).exists():
-                log.error("Cluster dir does not exist! %s", cache.cluster_dir)
+            elif (st := _stat(cluster_dir)) is None:
+                log.error("Cluster dir does not exist! %s", cluster_dir)
                 return False
-            elif not Path(cache.cluster_dir).is_dir():
-                log.error("Cluster path is not a directory! %s", cache.cluster_dir)
+            elif not stat.S_ISDIR(st.st_mode):
+                log.error("Cluster path is not a directory! %s", cluster_dir)
                 return False
             else:
-                cache.cluster_dir = Path(cache.cluster_dir)
+                cache.cluster_dir = Path(cluster_dir)
 
-            ban_file = settings.get("BanListFile", fallback="").replace('"', "")
+            ban_file = settings.get("banlistfile", "")
             if ban_file:
                 path = Path(ban_file)
-                if not path.exists():
+                if (st := _stat(ban_file)) is None:
                     log.error("Banlist file %s specified but does not exist!", path)
                     return False
-                if not path.is_file():
+                if not stat.S_ISREG(st.st_mode):
                     log.error("Banlist path %s is not a file!", path)
                     return False
                 # Ensure it's a .txt file
@@ -192,9 +311,9 @@ class ArkViewer:
             f"Output Dir: {cache.output_dir}\n"
             f"Working Dir: {os.getcwd()}\n"
             f"Debug: {cache.debug}\n"
-            f"Using Cores: {cache.threads}/{cpus}\n"
+            f"Using Cores: {cache.threads}/{AVAILABLE_CORES}\n"
             f"Priority: {cache.priority}\n"
-            f"OS: {'Windows' if IS_WINDOWS else 'Linux'}\n"
+            f"OS: {OS_NAME}\n"
             f"LD Lib: {os.environ.get('LD_LIBRARY_PATH')}\n"
         )
         log.info(txt)
@@ -205,30 +324,16 @@ class ArkViewer:
         except FileNotFoundError:
             log.error("Failed to check .NET version!")
 
-        if not cache.map_file.exists():
-            log.error("Map file does not exist!")
-            return False
-        if cache.cluster_dir and not cache.cluster_dir.exists():
-            log.error("Cluster dir does not exist!")
-            return False
         if not cache.exe_file.exists():
             log.error("Exporter does not exist!")
             return False
 
-        if cpus < 4:
+        if AVAILABLE_CORES < 4:
             log.warning("Server has less than 4 cores, performance may be impacted!")
 
-        if IS_WINDOWS:
-            scheduler.add_job(
-                process_export,
-                trigger="interval",
-                seconds=5,
-                next_run_time=datetime.now() + timedelta(seconds=5),
-                id="Handler.exporter",
-                max_instances=1,
-            )
-        else:
-            asyncio.create_task(export_loop(), name="export_loop")
+        cache.state_version += 1
+
+        asyncio.create_task(export_loop(), name="export_loop")
 
         asyncio.create_task(self.server(), name="arkview_server")
         asyncio.create_task(load_outputs(), name="load_outputs")
@@ -237,7 +342,6 @@ class ArkViewer:
         return True
 
     async def server(self):
-        global cache
         api.include_router(router)
         host = "127.0.0.1" if (cache.debug or not IS_EXE) else "0.0.0.0"
         # Check if user provided arguments for host and port
@@ -248,92 +352,98 @@ class ArkViewer:
             host=host,
             port=cache.port,
             log_level="debug" if cache.debug else "info",
-            # log_config=API_CONF,
+            # log_config=get_api_conf(),
             log_config=None,
             workers=1,
         )
         server = Server(config)
-        multiprocessing.freeze_support()
         try:
             await server.serve()
         except (KeyboardInterrupt, RuntimeError):
             pass
 
     async def check_keys(self, request: Request):
-        global cache
-        if cache.api_key and not request.headers.get(
-            "Authorization", request.headers.get("authorization")
-        ):
+        if not cache.api_key:
+            return
+        # Starlette headers are case-insensitive, so one lookup covers both spellings
+        auth = request.headers.get("Authorization")
+        if not auth:
             raise HTTPException(
-                status_code=405,
+                status_code=401,
                 detail="No API key provided!",
                 headers=self.info(stringify=True),
             )
-        if cache.api_key and cache.api_key != request.headers.get("Authorization"):
+        if not hmac.compare_digest(auth.encode(), cache.api_key.encode()):
             raise HTTPException(
                 status_code=401,
                 detail="Invalid API key!",
                 headers=self.info(stringify=True),
             )
 
-    def info(self, stringify: bool = False) -> dict:
-        global cache
+    def info(self, stringify: bool = False, into: dict | None = None) -> dict:
+        """Server info, merged into `into` in place when given to save a copy"""
+        global _info_version
+        if _info_version != cache.state_version:
+            _info_cache.clear()
+            _info_version = cache.state_version
+        if (typed := _info_cache.get(False)) is None:
+            typed = _info_cache[False] = self._build_info()
+        base = typed
+        if stringify and (base := _info_cache.get(True)) is None:
+            base = _info_cache[True] = _stringify(typed)
+        uptime = time.time() - BOOT_TIME
+        if into is None:
+            into = {}
+        into.update(base)
+        into["uptime"] = str(uptime) if stringify else uptime
+        return into
+
+    def _build_info(self) -> dict:
         day = 0
-        time = "00:00"
+        game_time = "00:00"
         for v in cache.exports.values():
             if "day" in v:
                 day = v["day"]
-                time = v["time"]
-        uptime = (
-            datetime.now() - datetime.fromtimestamp(psutil.boot_time())
-        ).total_seconds()
+                game_time = v["time"]
         return {
-            "last_export": str(int(cache.last_export))
-            if stringify
-            else int(cache.last_export),
-            "port": str(cache.port) if stringify else cache.port,
+            "last_export": cache.last_export,
+            "port": cache.port,
             "map_name": str(cache.map_file.name),
             "map_path": str(cache.map_file),
             "cluster_dir": str(cache.cluster_dir),
             "version": VERSION,
-            "cached_keys": ", ".join(cache.exports.keys())
-            if stringify
-            else list(cache.exports.keys()),
-            "day": str(day) if stringify else day,
-            "time": time,
-            "uptime": str(uptime) if stringify else uptime,
+            "cached_keys": list(cache.exports),
+            "day": day,
+            "time": game_time,
         }
 
     @router.get("/")
     async def get_info(self, request: Request):
         await self.check_keys(request)
         info = self.info()
-        log.info(f"Info requested!\n{json.dumps(info, indent=2)}")
-        return JSONResponse(content=info)
+        log.info(
+            f"Info requested!\n{orjson.dumps(info, option=orjson.OPT_INDENT_2).decode()}"
+        )
+        return ORJSONResponse(content=info)
 
     @router.get("/banlist")
     async def get_banlist(self, request: Request):
         await self.check_keys(request)
-        global cache
         if not cache.ban_file:
             raise HTTPException(
                 status_code=400,
                 detail="Banlist file not set!",
                 headers=self.info(stringify=True),
             )
-        if isinstance(cache.ban_file, Path) and not cache.ban_file.exists():
+        try:
+            bans = await asyncio.to_thread(_read_banlist, cache.ban_file)
+            return ORJSONResponse(content=self.info(into={"banlist": bans}))
+        except FileNotFoundError:
             raise HTTPException(
                 status_code=400,
                 detail="Banlist file does not exist!",
                 headers=self.info(stringify=True),
             )
-        try:
-            banlist_raw = cache.ban_file.read_text()
-            content = {
-                "banlist": [i.strip() for i in banlist_raw.split("\n") if i.strip()],
-                **self.info(),
-            }
-            return JSONResponse(content=content)
         except Exception as e:
             log.exception("Failed to read banlist file %s", cache.ban_file)
             raise HTTPException(
@@ -344,15 +454,15 @@ class ArkViewer:
 
     @router.put("/updatebanlist")
     async def update_banlist(self, request: Request, banlist: Banlist):
+        global _banlist_cache
         await self.check_keys(request)
-        global cache
         if not cache.ban_file:
             raise HTTPException(
                 status_code=400,
                 detail="Banlist file not set!",
                 headers=self.info(stringify=True),
             )
-        if not cache.ban_file.exists():
+        if not await asyncio.to_thread(cache.ban_file.exists):
             raise HTTPException(
                 status_code=400,
                 detail="Banlist file does not exist!",
@@ -365,40 +475,42 @@ class ArkViewer:
                 headers=self.info(stringify=True),
             )
         formatted = "\n".join(banlist.bans)
-        cache.ban_file.write_text(formatted)
-        return JSONResponse(content={"success": True, **self.info()})
+        await asyncio.to_thread(cache.ban_file.write_text, formatted)
+        # Coarse mtimes (FAT, SMB) can leave a same-size rewrite with the old fingerprint
+        _banlist_cache = None
+        return ORJSONResponse(content=self.info(into={"success": True}))
 
     # Players, Structures, Tamed, TribeLogs, Tribes, Wild, MapStructure
     @router.get("/data/{datatype}")
     async def get_data(self, request: Request, datatype: str):
         await self.check_keys(request)
-        global cache
-        if datatype.lower() not in VALID_DATATYPES:
-            joined = ", ".join(VALID_DATATYPES)
+        dtype = datatype.lower()
+        if dtype == ALL_SENTINEL:
+            data = cache.exports
+        elif dtype not in VALID_DATATYPES:
             raise HTTPException(
                 status_code=422,
-                detail=f"Invalid datatype, valid types are: {joined}",
+                detail=f"Invalid datatype, valid types are: {VALID_DATATYPES_TEXT}",
                 headers=self.info(stringify=True),
             )
-        if datatype.lower() == "all":
-            data = cache.exports
         else:
-            target_data = cache.exports.get(datatype)
+            target_data = cache.exports.get(dtype)
             if not target_data:
                 raise HTTPException(
                     status_code=404,
                     detail=f"Datatype {datatype} not cached yet!",
                     headers=self.info(stringify=True),
                 )
-            data = {datatype: target_data}
+            data = {dtype: target_data}
 
-        return JSONResponse(content={**data, **self.info()})
+        return Response(_merged_json(data, self.info()), media_type="application/json")
 
     @router.get("/overlimit/{limit}")
     async def get_over_limit(self, request: Request, limit: int):
         """Get all players who's tribe has uncryod tames over the limit"""
         await self.check_keys(request)
-        global cache
+        # Read together on the loop so the version always matches this tamed export
+        version = cache.state_version
         tamed = cache.exports.get("tamed")
         tribes = cache.exports.get("tribes")
         if not tamed:
@@ -415,53 +527,43 @@ class ArkViewer:
             )
 
         def _exe():
-            # First map all tames to tribes
-            found = set()
-            tribe_tames: dict[int, list[dict]] = defaultdict(list)
-            for tame in tamed["data"]:
-                if tame.get("uploadedTime") or tame["cryo"]:
-                    continue
-                key = f"{tame['id']}-{tame['dinoid']}"
-                if key in found:
-                    continue
-                found.add(key)
-                tribeid = int(tame["tribeid"])
-                tribe_tames[tribeid].append(tame)
-
+            tribe_tames = _uncryod_tames_by_tribe(tamed, version)
             over_limit: dict[str, list[dict]] = {}
             for tribe in tribes["data"]:
-                if not tribe.get("members"):
+                if not (members := tribe.get("members")):
                     continue
                 uncryod: list[dict] = tribe_tames.get(tribe["tribeid"], [])
                 if len(uncryod) <= limit:
                     continue
-                for member in tribe["members"]:
+                # Every member shares the same list object
+                for member in members:
                     over_limit[member["steamid"]] = uncryod
             return over_limit
 
         over_limit: dict[str, list[dict]] = await asyncio.to_thread(_exe)
-        return JSONResponse(content={"overlimit": over_limit, **self.info()})
+        return ORJSONResponse(content=self.info(into={"overlimit": over_limit}))
 
     @router.post("/datas")
     async def get_datas(self, request: Request, datatypes: Dtypes):
         await self.check_keys(request)
-        global cache
+        dtypes = [datatype.lower() for datatype in datatypes.dtypes]
         invalid_types = [
-            datatype for datatype in datatypes.dtypes if datatype not in VALID_DATATYPES
+            datatype
+            for datatype in dtypes
+            if datatype != ALL_SENTINEL and datatype not in VALID_DATATYPES
         ]
 
         if invalid_types:
-            joined_valid = ", ".join(VALID_DATATYPES)
             joined_invalid = ", ".join(invalid_types)
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid data types {joined_invalid}, valid types are: {joined_valid}",
+                detail=f"Invalid data types {joined_invalid}, valid types are: {VALID_DATATYPES_TEXT}",
                 headers=self.info(stringify=True),
             )
 
         data = {}
 
-        for datatype in datatypes.dtypes:
+        for datatype in dtypes:
             target_data = cache.exports.get(datatype)
             if not target_data:
                 raise HTTPException(
@@ -471,15 +573,15 @@ class ArkViewer:
                 )
             data[datatype] = target_data
 
-        return JSONResponse(content={**data, **self.info()})
+        return ORJSONResponse(content=self.info(into=data))
 
     @router.get("/stats")
     async def get_system_info(self, request: Request):
         await self.check_keys(request)
         base = self.info()
         try:
-            stats = await asyncio.to_thread(format_sys_info)
-            return JSONResponse(content={**base, **stats})
+            stats = await _get_sys_info()
+            return ORJSONResponse(content={**base, **stats})
         except Exception as e:
             log.exception("Failed to get system info!")
             raise HTTPException(
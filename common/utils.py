@@ -1,27 +1,19 @@
-import asyncio
+import functools
 import logging
 import os
 import subprocess
+import time
 import webbrowser
-from datetime import datetime
 
 import cpuinfo
 import psutil
 
-log = logging.getLogger("arkview.common.utils")
-
+from .constants import IS_WINDOWS
 
-async def wait_for_process(process: str):
-    def _is_running():
-        try:
-            running = [p.name() for p in psutil.process_iter()]
-            return any(process in procname for procname in running)
-        except psutil.NoSuchProcess:
-            return True
+log = logging.getLogger("arkview.common.utils")
 
-    while await asyncio.to_thread(_is_running):
-        log.debug("Waiting for ASV to export")
-        await asyncio.sleep(5)
+# Fixed for the life of the process, psutil re-reads it from the OS on every call
+BOOT_TIME = psutil.boot_time()
 
 
 def dotnet_installed() -> bool:
@@ -42,33 +34,20 @@ def dotnet_installed() -> bool:
             is_installed = False
         elif version > "6.9.9":
             is_installed = False
-    windows = True if "C:\\Users" in os.environ.get("USERPROFILE", "") else False
     if not is_installed:
         log.critical(".NET V6.0 framework is REQUIRED!")
-        if windows:
+        if IS_WINDOWS:
             webbrowser.open("https://dotnet.microsoft.com/en-us/download/dotnet/6.0")
     return is_installed
 
 
-def get_affinity_mask(threads: int) -> str:
-    # https://poweradm.com/set-cpu-affinity-powershell/
+@functools.lru_cache(maxsize=64)
+def get_affinity_cores(threads: int) -> tuple[int, ...]:
+    """Indexes of the last `threads` cores, for psutil.Process.cpu_affinity"""
     cpus = os.cpu_count() or 1
-    if threads > cpus:
-        threads = cpus
-
-    options = []
-    num = 1
-    for _ in range(cpus):
-        if not options:
-            options.append(num)
-        else:
-            num = num * 2
-            options.append(num)
-
-    # Reverse and use last core first
-    options = options[-threads:]
-    mask = sum(options) if options else 1
-    return hex(mask)
+    threads = max(1, min(threads, cpus))
+    # Prefer the highest numbered cores, the OS tends to favour the low ones
+    return tuple(range(cpus))[-threads:]
 
 
 def format_sys_info() -> dict:
@@ -119,9 +98,7 @@ def format_sys_info() -> dict:
     sent = get_size(net.bytes_sent)
     recv = get_size(net.bytes_recv)
 
-    uptime = (
-        datetime.now() - datetime.fromtimestamp(psutil.boot_time())
-    ).total_seconds()
+    uptime = time.time() - BOOT_TIME
 
     res = {
         "cpu": {
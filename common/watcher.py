@@ -0,0 +1,35 @@
+import logging
+import os
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from watchfiles import Change, awatch
+
+log = logging.getLogger("arkview.watcher")
+
+
+async def watch_file(path: Path, timeout: int) -> AsyncIterator[None]:
+    """Yield whenever a file changes, using inotify/ReadDirectoryChangesW instead of polling.
+
+    Parameters
+    ----------
+    path: Path
+        The file to watch. Its parent folder is what actually gets watched, since Ark saves
+        by writing a temp file and renaming it over the map.
+    timeout: int
+        Seconds after which to yield anyway, so a missed event can't stall callers forever.
+    """
+    name = path.name
+
+    def _is_target(change: Change, changed_path: str) -> bool:
+        return os.path.basename(changed_path) == name
+
+    log.debug("Watching %s", path)
+    async for _ in awatch(
+        path.parent,
+        watch_filter=_is_target,
+        recursive=False,
+        rust_timeout=timeout * 1000,
+        yield_on_timeout=True,
+    ):
+        yield
@@ -1,14 +1,21 @@
 import asyncio
 import logging
+import multiprocessing
 import os
 import sys
 
-from common.constants import IS_WINDOWS
+from common.constants import IS_WINDOWS, ensure_layout
+from common.exporter import load_tribelog_buffer, save_tribelog_buffer
 from common.logger import init_logging
 from common.scheduler import scheduler
 from common.tasks import ArkViewer
 from common.version import VERSION
 
+if IS_WINDOWS:
+    new_event_loop = asyncio.ProactorEventLoop
+else:
+    from uvloop import new_event_loop
+
 init_logging()
 
 
@@ -26,6 +33,7 @@ class Manager:
         log.info(f"Version: {VERSION}")
         scheduler.start()
         scheduler.remove_all_jobs()
+        load_tribelog_buffer()
         success = await self.handler.initialize()
         if not success:
             input("Initialization failed. Press any key to exit...")
@@ -34,6 +42,10 @@ class Manager:
     async def shutdown(self) -> None:
         scheduler.remove_all_jobs()
         scheduler.shutdown(wait=False)
+        try:
+            save_tribelog_buffer()
+        except Exception as e:
+            log.error("Failed to save tribelog buffer", exc_info=e)
 
         tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
         [task.cancel() for task in tasks]
@@ -52,8 +64,9 @@ class Manager:
     @classmethod
     def run(cls) -> None:
         log.info(f"Starting ArkViewer with PID {os.getpid()}")
+        ensure_layout()
 
-        loop = asyncio.ProactorEventLoop() if IS_WINDOWS else asyncio.new_event_loop()
+        loop = new_event_loop()
         asyncio.set_event_loop(loop)
         arkview = cls(loop)
 
@@ -78,4 +91,5 @@ class Manager:
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     Manager.run()